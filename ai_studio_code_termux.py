@@ -1,10 +1,20 @@
 import os
+import re
 import time
+import codecs
+import sys
+import shutil
+import tempfile
+import argparse
+import asyncio
+import threading
 import extract_msg
 import vobject
 from telegram import Update, ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton
 from warnings import filterwarnings
 from telegram.warnings import PTBUserWarning
+from telegram.error import TelegramError
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from telegram.ext import Updater, ApplicationBuilder, CommandHandler, MessageHandler, filters, CallbackQueryHandler, ConversationHandler, PicklePersistence, CallbackContext, ContextTypes
 import logging
 import json
@@ -28,6 +38,26 @@ CHOOSING = 0
 
 ALLOWED_USERS_FILE = 'allowed_users.json'
 
+# Minimum seconds between edits of a conversion status message
+PROGRESS_UPDATE_INTERVAL = 3
+# Records written between progress reports and cancel checks inside a VCF partition
+PROGRESS_RECORDS = 10000
+
+# Phone number extraction from MSG bodies and attachments
+# A run of digit groups, split into numbers by _split_phone_numbers
+PHONE_NUMBER_PATTERN = re.compile(rb'(?<![\w+])\+?\(?\d(?:[ .()-]{0,2}\d){6,}(?![\d:])')
+PHONE_NUMBER_CHARS = b'0123456789 .()+-'
+DIGIT_GROUP_PATTERN = re.compile(rb'\d+')
+DOTTED_GROUPS_PATTERN = re.compile(rb'\(?\d{1,3}(?:\.\d{1,3})+')  # IP addresses, versions, dates
+MIN_PHONE_DIGITS = 10
+MAX_PHONE_DIGITS = 15  # E.164 limit
+NUMBER_ATTACHMENT_EXTENSIONS = ('.csv', '.txt')
+MAX_MSG_DEPTH = 3  # Levels of nested .msg attachments to scan
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+# Running conversion jobs per user: {user_id: (task, cancel_event)}
+active_jobs = {}
+
 # Load allowed users from JSON file
 def load_allowed_users():
     if os.path.exists(ALLOWED_USERS_FILE):
@@ -52,10 +82,28 @@ def log_activity(user_id, username, action, details=None):
         log_message += f" - Details: {details}"
     logger.info(log_message)
 
-def convert_msg_to_txt(file_path):
+def _safe_filename(name, default='contacts'):
+    """Function to turn user input into a file name that can't leave the output directory"""
+    safe_filename = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_filename or default
+
+def _output_path(file_path, suffix, output_dir=None, output_stem=None):
+    """Function to build an output path (next to file_path by default), refusing to overwrite the input"""
+    if output_stem is None:
+        output_stem = os.path.splitext(os.path.basename(file_path))[0]
+    if output_dir is None:
+        output_dir = os.path.dirname(file_path)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, output_stem + suffix)
+    if os.path.abspath(output_path) == os.path.abspath(file_path):
+        raise ValueError(f"Output would overwrite the input file: {file_path}")
+    return output_path
+
+def convert_msg_to_txt(file_path, output_dir=None, output_stem=None):
     try:
+        txt_file_path = _output_path(file_path, '.txt', output_dir, output_stem)
         msg = extract_msg.Message(file_path)
-        txt_file_path = file_path.replace('.msg', '.txt')
         with open(txt_file_path, 'w', encoding='utf-8') as f:
             f.write(f"Subject: {msg.subject}\n")
             f.write(f"From: {msg.sender}\n")
@@ -65,77 +113,79 @@ def convert_msg_to_txt(file_path):
             f.write(msg.body)
         return txt_file_path
     except Exception as e:
-        print(f"Error converting MSG to TXT: {str(e)}")
+        logger.error(f"Error converting MSG to TXT: {str(e)}")
         return None
 
-def convert_txt_to_vcf(file_path, vcf_filename, contact_name, partition_size=None):
-    """Function to convert a TXT file to VCF with a specified partition limit (default unlimited)"""
-    try:
-        logger.info(f"Converting TXT to VCF: {file_path} -> {vcf_filename}")
-        # Read numbers from TXT file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            numbers = [line.strip() for line in f if line.strip()]
-        
-        # Create VCF file(s)
-        vcf_files = []  # List to store paths of created VCF files
-        os.makedirs('downloads', exist_ok=True)
-        
-        # If partition_size is not specified, use the length of the numbers list
-        if partition_size is None or partition_size > len(numbers):
-            partition_size = len(numbers)
-        
-        for i in range(0, len(numbers), partition_size):  # Divide numbers into groups according to partition_size
-            vcf_file_path = f"downloads/{vcf_filename}_{i//partition_size + 1}.vcf"  # VCF file name
+def iter_numbers_to_vcf(numbers, vcf_filename, contact_name, partition_size=None, cancel_event=None, output_dir='downloads'):
+    """Generator that writes one VCF partition at a time and yields (vcf_file_path, processed, total).
+
+    Every PROGRESS_RECORDS records it also yields (None, processed, total) as a progress report.
+    Once cancel_event is set, or if the generator is closed mid-partition, the partition being
+    written is removed.
+    """
+    if not numbers:
+        raise ValueError(f"No numbers to convert for {vcf_filename}")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # If partition_size is not specified, use the length of the numbers list
+    if partition_size is None or partition_size > len(numbers):
+        partition_size = len(numbers)
+    
+    for i in range(0, len(numbers), partition_size):  # Divide numbers into groups according to partition_size
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info(f"VCF conversion canceled: {vcf_filename}")
+            return
+        vcf_file_path = os.path.join(output_dir, f"{vcf_filename}_{i//partition_size + 1}.vcf")  # VCF file name
+        end = min(i + partition_size, len(numbers))
+        complete = False
+        try:
             with open(vcf_file_path, 'w', encoding='utf-8') as f:
-                for j in range(i, min(i + partition_size, len(numbers))):  # Take according to partition_size
+                for j in range(i, end):  # Take according to partition_size
+                    if j > i and j % PROGRESS_RECORDS == 0:
+                        if cancel_event is not None and cancel_event.is_set():
+                            break
+                        yield None, j, len(numbers)
                     f.write("BEGIN:VCARD\n")
                     f.write("VERSION:3.0\n")
                     f.write(f"FN:{contact_name} {j + 1}\n")  # Add sequential number
                     f.write(f"TEL;TYPE=CELL:{numbers[j]}\n")
                     f.write("END:VCARD\n")
-            vcf_files.append(vcf_file_path)  # Store path of created VCF file
-        
-        return vcf_files  # Return list of created VCF files
-    except Exception as e:
-        logger.error(f"Error converting TXT to VCF: {str(e)}")
-        return None
+            complete = cancel_event is None or not cancel_event.is_set()
+        finally:
+            if not complete:
+                # Canceled, failed or closed mid-partition: it will never be sent, don't leave it behind
+                cleanup_files(vcf_file_path)
+        if not complete:
+            logger.info(f"VCF conversion canceled: {vcf_filename}")
+            return
+        yield vcf_file_path, end, len(numbers)
+
+def iter_txt_to_vcf(file_path, vcf_filename, contact_name, partition_size=None, cancel_event=None, output_dir='downloads'):
+    """Generator version of convert_txt_to_vcf, see iter_numbers_to_vcf"""
+    logger.info(f"Converting TXT to VCF: {file_path} -> {vcf_filename}")
+    # Read numbers from TXT file
+    with open(file_path, 'r', encoding='utf-8') as f:
+        numbers = [line.strip() for line in f if line.strip()]
+    if not numbers:
+        raise ValueError(f"No numbers found in {file_path}")
+    
+    yield from iter_numbers_to_vcf(numbers, vcf_filename, contact_name, partition_size, cancel_event, output_dir)
 
-def convert_msg_to_vcf(file_path, adm_number, navy_number):
+def convert_txt_to_vcf(file_path, vcf_filename, contact_name, partition_size=None, output_dir='downloads'):
+    """Function to convert a TXT file to VCF with a specified partition limit (default unlimited)"""
     try:
-        logger.info(f"Converting MSG to VCF: {file_path}")
-        msg = extract_msg.Message(file_path)
-        vcf_file_path = file_path.replace('.msg', '.vcf')
-        with open(vcf_file_path, 'w', encoding='utf-8') as f:
-            # ADM Format
-            f.write("BEGIN:VCARD\n")
-            f.write("VERSION:3.0\n")
-            f.write(f"FN:{msg.sender}\n")
-            f.write(f"TEL:{adm_number}\n")  # ADM number without TYPE
-            f.write(f"NOTE:SUBJECT: {msg.subject}\n")
-            f.write(f"NOTE:DATE: {msg.date}\n")
-            f.write(f"NOTE:BODY:\n{msg.body}\n")
-            f.write("END:VCARD\n")
-            
-            # NAVY Format
-            f.write("BEGIN:VCARD\n")
-            f.write("VERSION:3.0\n")
-            f.write(f"FN:{msg.sender}\n")
-            f.write(f"TEL:{navy_number}\n")  # NAVY number without TYPE
-            f.write(f"NOTE:SUBJECT: {msg.subject}\n")
-            f.write(f"NOTE:DATE: {msg.date}\n")
-            f.write(f"NOTE:BODY:\n{msg.body}\n")
-            f.write("END:VCARD\n")
-        
-        return vcf_file_path
+        # Return list of created VCF files
+        parts = iter_txt_to_vcf(file_path, vcf_filename, contact_name, partition_size, output_dir=output_dir)
+        return [vcf_file_path for vcf_file_path, _, _ in parts if vcf_file_path]
     except Exception as e:
-        print(f"Error converting MSG to VCF: {str(e)}")
+        logger.error(f"Error converting TXT to VCF: {str(e)}")
         return None
 
-def convert_msg_to_adm_navy(file_path, adm_number, navy_number):
+def convert_msg_to_adm_navy(file_path, adm_number, navy_number, output_dir=None, output_stem=None):
     try:
+        adm_file_path = _output_path(file_path, '_ADM.txt', output_dir, output_stem)
+        navy_file_path = _output_path(file_path, '_NAVY.txt', output_dir, output_stem)
         msg = extract_msg.Message(file_path)
-        adm_file_path = file_path.replace('.msg', '_ADM.txt')
-        navy_file_path = file_path.replace('.msg', '_NAVY.txt')
         with open(adm_file_path, 'w', encoding='utf-8') as f:
             f.write("=== ADM FORMAT ===\n")
             f.write(f"FROM: {msg.sender}\n")
@@ -154,9 +204,261 @@ def convert_msg_to_adm_navy(file_path, adm_number, navy_number):
             f.write(msg.body)
         return (adm_file_path, navy_file_path)
     except Exception as e:
-        print(f"Error converting MSG to ADM/NAVY: {str(e)}")
+        logger.error(f"Error converting MSG to ADM/NAVY: {str(e)}")
+        return None
+
+def _iter_chunks(data, chunk_size=SCAN_CHUNK_SIZE):
+    """Yield byte chunks of an attachment payload without copying or decoding it as a whole"""
+    view = memoryview(data)
+    encoding = None
+    if view[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+        encoding = 'utf-16'
+    if encoding is None:
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+        return
+    # UTF-16 text interleaves NUL bytes between digits, so re-encode it chunk by chunk
+    decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+    for start in range(0, len(view), chunk_size):
+        yield decoder.decode(view[start:start + chunk_size]).encode('utf-8')
+    yield decoder.decode(b'', final=True).encode('utf-8')
+
+def iter_phone_numbers(chunks, cancel_event=None):
+    """Generator that scans byte chunks for phone numbers and yields them normalized (+ and digits only)"""
+    carry = b''
+    for chunk in chunks:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        chunk = bytes(chunk)
+        # Hold back the trailing run of number characters, it may continue in the next chunk.
+        # The carry is always such a run, so only the new chunk has to be checked.
+        kept = len(chunk.rstrip(PHONE_NUMBER_CHARS))
+        buffer = carry + chunk
+        if kept == 0:
+            carry = buffer
+            continue
+        # Cut right after the last non-number character so no match can end at the cut
+        cut = len(carry) + kept
+        for match in PHONE_NUMBER_PATTERN.finditer(buffer, 0, cut):
+            yield from _split_phone_numbers(match.group())
+        # Keep that non-number character so the look-behind still sees it
+        carry = buffer[cut - 1:]
+    for match in PHONE_NUMBER_PATTERN.finditer(carry):
+        yield from _split_phone_numbers(match.group())
+
+def _split_phone_numbers(raw):
+    """Generator that splits a run of digit groups into normalized phone numbers (+ and digits only).
+
+    A group that is a full number on its own never joins its neighbours, except a leading
+    +country code. Runs too long for one number are split at the first group boundary
+    where the number is long enough.
+    """
+    if DOTTED_GROUPS_PATTERN.fullmatch(raw):
+        return
+    groups = DIGIT_GROUP_PATTERN.findall(raw)
+    plus = raw.startswith(b'+')
+    segments = []
+    segment = []
+    for index, group in enumerate(groups):
+        if len(group) < MIN_PHONE_DIGITS:
+            segment.append(group)
+        elif index == 1 and plus and len(groups[0]) <= 3:
+            segments.append([groups[0], group])  # +91 9876543210
+            segment = []
+        else:
+            if segment:
+                segments.append(segment)
+            segments.append([group])
+            segment = []
+    if segment:
+        segments.append(segment)
+
+    for position, segment in enumerate(segments):
+        prefix = '+' if plus and position == 0 else ''
+        if sum(map(len, segment)) <= MAX_PHONE_DIGITS:
+            parts = [b''.join(segment)]
+        else:
+            # Too long for one number: cut as soon as each part is long enough
+            parts = []
+            number = b''
+            for group in segment:
+                number += group
+                if len(number) >= MIN_PHONE_DIGITS:
+                    parts.append(number)
+                    number = b''
+        for number in parts:
+            if MIN_PHONE_DIGITS <= len(number) <= MAX_PHONE_DIGITS:
+                yield prefix + number.decode('ascii')
+            prefix = ''
+
+def _iter_msg_numbers(msg, depth, cancel_event=None):
+    """Generator that yields phone numbers from a message body and its CSV, TXT and nested MSG attachments"""
+    if msg.body:
+        yield from iter_phone_numbers(_iter_chunks(msg.body.encode('utf-8')), cancel_event)
+    for attachment in msg.attachments:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        data = attachment.data
+        if data is None:
+            continue
+        if isinstance(data, (bytes, bytearray)):
+            name = (getattr(attachment, 'longFilename', None) or getattr(attachment, 'shortFilename', None) or '').lower()
+            if name.endswith(NUMBER_ATTACHMENT_EXTENSIONS):
+                yield from iter_phone_numbers(_iter_chunks(data), cancel_event)
+        elif depth < MAX_MSG_DEPTH and hasattr(data, 'attachments'):
+            # Embedded .msg attachment
+            yield from _iter_msg_numbers(data, depth + 1, cancel_event)
+
+def extract_numbers_from_msg(file_path, cancel_event=None):
+    """Function to extract unique phone numbers (in order of appearance) from an MSG file.
+
+    Scanning stops early, returning what was found so far, once cancel_event is set.
+    """
+    msg = extract_msg.Message(file_path)
+    try:
+        return list(dict.fromkeys(_iter_msg_numbers(msg, 0, cancel_event)))
+    finally:
+        msg.close()
+
+def iter_msg_to_vcf(file_path, vcf_filename, contact_name, partition_size=None, cancel_event=None, output_dir='downloads'):
+    """Generator that writes the phone numbers found in an MSG file to VCF, see iter_numbers_to_vcf"""
+    logger.info(f"Extracting numbers from MSG to VCF: {file_path} -> {vcf_filename}")
+    numbers = extract_numbers_from_msg(file_path, cancel_event)
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info(f"MSG number extraction canceled: {file_path}")
+        return
+    logger.info(f"Found {len(numbers)} numbers in {file_path}")
+    if not numbers:
+        raise ValueError("No phone numbers found in the MSG file or its attachments.")
+    
+    yield from iter_numbers_to_vcf(numbers, vcf_filename, contact_name, partition_size, cancel_event, output_dir)
+
+def convert_msg_to_vcf(file_path, vcf_filename, contact_name, partition_size=None, output_dir='downloads'):
+    """Function to convert the phone numbers found in an MSG file to VCF (default unlimited partition)"""
+    try:
+        # Return list of created VCF files
+        parts = iter_msg_to_vcf(file_path, vcf_filename, contact_name, partition_size, output_dir=output_dir)
+        return [vcf_file_path for vcf_file_path, _, _ in parts if vcf_file_path]
+    except Exception as e:
+        logger.error(f"Error converting MSG to VCF: {str(e)}")
         return None
 
+class ProgressReporter:
+    """Class to show conversion progress by editing a single status message"""
+
+    def __init__(self, message, label, reply_markup=None, interval=PROGRESS_UPDATE_INTERVAL):
+        self.message = message
+        self.label = label
+        self.reply_markup = reply_markup
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last_update = None
+        self.last_text = None
+
+    def format(self, processed, total, parts_sent):
+        text = f"⏳ {self.label}\nRecords: {processed}/{total}\nParts sent: {parts_sent}"
+        if 0 < processed < total:
+            elapsed = time.monotonic() - self.started
+            eta = int(elapsed / processed * (total - processed))
+            text += f"\nETA: {eta // 60}m {eta % 60}s"
+        return text
+
+    async def edit(self, text, reply_markup=None):
+        if text == self.last_text:
+            return
+        try:
+            await self.message.edit_text(text, reply_markup=reply_markup)
+            self.last_text = text
+        except TelegramError as e:
+            logger.warning(f"Could not update status message: {str(e)}")
+
+    async def update(self, processed, total, parts_sent):
+        # Throttle edits to stay well within Telegram's rate limits
+        now = time.monotonic()
+        if self.last_update is not None and now - self.last_update < self.interval:
+            return
+        self.last_update = now
+        await self.edit(self.format(processed, total, parts_sent), self.reply_markup)
+
+    async def finish(self, text):
+        await self.edit(text)
+
+def cancel_active_job(user_id):
+    """Function to cancel the user's running conversion, returns True if one was running"""
+    job = active_jobs.pop(user_id, None)
+    if job is None:
+        return False
+    task, cancel_event = job
+    cancel_event.set()  # Stop the worker thread at its next cancel check
+    task.cancel()  # Stop sending parts immediately
+    log_activity(user_id, None, "Conversion canceled")
+    return True
+
+async def run_conversion_job(update: Update, context: CallbackContext, parts, label, success_text, cancel_event):
+    """Function to send each part as it is converted while reporting progress.
+
+    `parts` is a generator yielding (file_path, processed, total), e.g. from iter_txt_to_vcf,
+    with file_path None for progress-only reports. It must stop once cancel_event is set.
+    """
+    user = update.effective_user
+    cancel_markup = InlineKeyboardMarkup([[InlineKeyboardButton("Cancel", callback_data='cancel_job')]])
+    status = await update.message.reply_text(f"⏳ {label}...", reply_markup=cancel_markup)
+    reporter = ProgressReporter(status, label, cancel_markup)
+    written = []
+    processed = total = parts_sent = 0
+    pending = None
+    try:
+        while True:
+            # Convert off the event loop so the bot stays responsive. The worker is shielded
+            # so that on cancel we can still wait for it and clean up what it wrote.
+            pending = asyncio.ensure_future(asyncio.to_thread(next, parts, None))
+            part = await asyncio.shield(pending)
+            pending = None
+            if part is None:
+                break
+            part_path, processed, total = part
+            if part_path is None:
+                await reporter.update(processed, total, parts_sent)
+                continue
+            written.append(part_path)
+            with open(part_path, 'rb') as f:
+                await context.bot.send_document(
+                    chat_id=update.effective_chat.id,
+                    document=f,
+                    filename=os.path.basename(part_path)
+                )
+            parts_sent += 1
+            await reporter.update(processed, total, parts_sent)
+
+        await reporter.finish(f"{success_text}\nRecords: {processed}/{total}\nParts sent: {parts_sent}")
+        return await start(update, context)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        if pending is not None:
+            # Wait for the worker thread to reach its next cancel check
+            try:
+                part = await pending
+            except Exception:
+                part = None
+            if part is not None and part[0] is not None:
+                written.append(part[0])
+        await reporter.finish(f"❌ Process canceled.\nRecords: {processed}/{total}\nParts sent: {parts_sent}")
+        cleanup_files(*written)
+        raise
+    except Exception as e:
+        logger.error(f"Error during '{label}': {str(e)}")
+        await reporter.finish(f"❌ An error occurred: {str(e)}")
+        return await start(update, context)
+    finally:
+        # Close the generator so a partition it was in the middle of gets removed
+        try:
+            parts.close()
+        except ValueError:
+            logger.warning(f"'{label}' worker still running, could not close it")
+        job = active_jobs.get(user.id)
+        if job is not None and job[0] is asyncio.current_task():
+            del active_jobs[user.id]
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Function to start the conversation and display the initial menu."""
     user = update.effective_user
@@ -198,6 +500,8 @@ async def handle_text(update: Update, context: CallbackContext):
     log_activity(user.id, user.username, "Text command", text)
     
     if text in ["Start 🔄", "Cancel"]:
+        if cancel_active_job(user.id):
+            await update.message.reply_text("❌ Process canceled.")
         context.user_data.clear()
         return await start(update, context)
     elif text == "Developer 👨‍💻":
@@ -418,7 +722,8 @@ async def handle_text(update: Update, context: CallbackContext):
             context.user_data['waiting_for_numbers'] = True
             await update.message.reply_text(
                 f"Contact name '{text}' has been saved.\n"
-                "Please send contact numbers (can be more than one, separate with newlines)."
+                "Please send contact numbers (can be more than one, separate with newlines), "
+                "or send a .msg file to extract the numbers from it."
             )
             return CHOOSING
         
@@ -484,6 +789,11 @@ async def button(update: Update, context: CallbackContext):
         context.user_data['waiting_for_adm_number'] = False
         context.user_data['waiting_for_navy_number'] = False
 
+    elif query.data == 'cancel_job':
+        # Cancel button on a conversion status message
+        if not cancel_active_job(update.effective_user.id):
+            await query.edit_message_reply_markup(reply_markup=None)
+
     # Add other button logic if needed
 
 async def save_message_to_txt(update: Update, context: CallbackContext):
@@ -540,25 +850,43 @@ async def handle_file(update: Update, context: CallbackContext):
         await file.download_to_drive(downloaded_file)
         
         if context.user_data.get('waiting_for_txt_file'):
-            # Convert TXT to VCF
-            vcf_filename = context.user_data.get('vcf_filename', 'contacts')
+            if user.id in active_jobs:
+                await update.message.reply_text("⏳ A conversion is already running. Press Cancel to stop it first.")
+                return CHOOSING
+            
+            # Convert TXT to VCF as a tracked background task so Cancel can stop it
+            vcf_filename = _safe_filename(context.user_data.get('vcf_filename') or '')
             contact_name = context.user_data.get('contact_name', 'Contact')
-            vcf_files = convert_txt_to_vcf(downloaded_file, vcf_filename, contact_name, context.user_data.get('partition_size'))
+            cancel_event = threading.Event()
+            parts = iter_txt_to_vcf(downloaded_file, vcf_filename, contact_name, context.user_data.get('partition_size'), cancel_event)
+            task = context.application.create_task(
+                run_conversion_job(update, context, parts, "Converting TXT to VCF", "All VCF files created successfully ✅!", cancel_event),
+                update=update
+            )
+            active_jobs[user.id] = (task, cancel_event)
             
-            if vcf_files:
-                for vcf_file in vcf_files:
-                    await context.bot.send_document(
-                        chat_id=update.effective_chat.id,
-                        document=open(vcf_file, 'rb'),
-                        filename=os.path.basename(vcf_file)
-                    )
-                await update.message.reply_text("All VCF files created successfully ✅!")
-            else:
-                await update.message.reply_text("❌ An error occurred while creating the VCF file.")
+            # Reset state
+            context.user_data.clear()
+            return CHOOSING
+        
+        elif context.user_data.get('waiting_for_numbers') and file_name.lower().endswith('.msg'):
+            if user.id in active_jobs:
+                await update.message.reply_text("⏳ A conversion is already running. Press Cancel to stop it first.")
+                return CHOOSING
+            
+            # Extract numbers from the MSG body and attachments straight into VCF
+            contact_name = context.user_data['contact_name']
+            cancel_event = threading.Event()
+            parts = iter_msg_to_vcf(downloaded_file, _safe_filename(contact_name), contact_name, cancel_event=cancel_event)
+            task = context.application.create_task(
+                run_conversion_job(update, context, parts, "Extracting numbers from MSG", "VCF file created successfully! ✅", cancel_event),
+                update=update
+            )
+            active_jobs[user.id] = (task, cancel_event)
             
             # Reset state
             context.user_data.clear()
-            return await start(update, context)
+            return CHOOSING
         
     except Exception as e:
         await update.message.reply_text(f"❌ An error occurred: {str(e)}")
@@ -595,7 +923,7 @@ def create_vcf_from_numbers(adm_numbers, navy_numbers):
         
         return vcf_file_path
     except Exception as e:
-        print(f"Error creating VCF: {str(e)}")
+        logger.error(f"Error creating VCF: {str(e)}")
         return None
 
 def create_vcf_from_message(contact_name, message_text, contact_numbers, vcf_filename=None):
@@ -603,8 +931,7 @@ def create_vcf_from_message(contact_name, message_text, contact_numbers, vcf_fil
     try:
         # Use the given filename or contact name if none
         filename = vcf_filename if vcf_filename else contact_name
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        vcf_file_path = f"downloads/{safe_filename}.vcf"
+        vcf_file_path = f"downloads/{_safe_filename(filename)}.vcf"
         
         with open(vcf_file_path, 'w', encoding='utf-8') as f:
             for number in contact_numbers:
@@ -624,15 +951,15 @@ def create_vcf_from_message(contact_name, message_text, contact_numbers, vcf_fil
         
         return vcf_file_path
     except Exception as e:
-        print(f"Error creating VCF from message: {str(e)}")
+        logger.error(f"Error creating VCF from message: {str(e)}")
         return None
 
-def create_vcf_from_multiple_numbers(adm_numbers, navy_numbers):
+def create_vcf_from_multiple_numbers(adm_numbers, navy_numbers, output_dir='downloads'):
     """Function to create VCF from Admin and Navy numbers"""
     try:
         logger.info(f"Creating VCF from multiple numbers - ADM: {len(adm_numbers)}, NAVY: {len(navy_numbers)}")
-        vcf_file_path = "downloads/AdminNavy.vcf"
-        os.makedirs('downloads', exist_ok=True)
+        vcf_file_path = os.path.join(output_dir, "AdminNavy.vcf")
+        os.makedirs(output_dir, exist_ok=True)
         
         with open(vcf_file_path, 'w', encoding='utf-8') as f:
             # Write Admin numbers
@@ -656,11 +983,11 @@ def create_vcf_from_multiple_numbers(adm_numbers, navy_numbers):
         logger.error(f"Error creating VCF: {str(e)}")
         return None
 
-def create_vcf_from_contacts(contacts):
+def create_vcf_from_contacts(contacts, output_dir='downloads'):
     """Function to create VCF from a list of contacts"""
     try:
-        vcf_file_path = "downloads/contacts.vcf"
-        os.makedirs('downloads', exist_ok=True)
+        vcf_file_path = os.path.join(output_dir, "contacts.vcf")
+        os.makedirs(output_dir, exist_ok=True)
         
         with open(vcf_file_path, 'w', encoding='utf-8') as f:
             for contact in contacts:
@@ -675,24 +1002,25 @@ def create_vcf_from_contacts(contacts):
         logger.error(f"Error creating VCF: {str(e)}")
         return None
 
-async def convert_and_send_vcf(update: Update, context: CallbackContext, file_path, adm_number, navy_number):
+async def convert_and_send_vcf(update: Update, context: CallbackContext, file_path, contact_name):
     try:
-        vcf_file_path = convert_msg_to_vcf(file_path, adm_number, navy_number)
+        vcf_filename = os.path.splitext(os.path.basename(file_path))[0]
+        vcf_files = await asyncio.to_thread(convert_msg_to_vcf, file_path, vcf_filename, contact_name)
         
-        if vcf_file_path:
-            await context.bot.send_document(
-                chat_id=update.effective_chat.id,
-                document=open(vcf_file_path, 'rb'),
-                filename=os.path.basename(vcf_file_path)
-            )
+        if vcf_files:
+            for vcf_file in vcf_files:
+                with open(vcf_file, 'rb') as f:
+                    await context.bot.send_document(
+                        chat_id=update.effective_chat.id,
+                        document=f,
+                        filename=os.path.basename(vcf_file)
+                    )
         else:
             await update.message.reply_text("❌ An error occurred: VCF file could not be created.")
     
     except Exception as e:
         await update.message.reply_text(f"❌ An error occurred: {str(e)}")
 
-                
-
 def _build_application(_token: str):
     application = ApplicationBuilder().token(_token).build()
     application.add_handler(CommandHandler("start", start))
@@ -701,8 +1029,214 @@ def _build_application(_token: str):
     application.add_handler(CallbackQueryHandler(button))
     return application
 
+# Input file extension for each CLI command
+CLI_INPUT_EXTENSIONS = {
+    'txt2vcf': '.txt',
+    'msg2txt': '.msg',
+    'msg2adm-navy': '.msg',
+    'msg2vcf': '.msg',
+}
+
+def _read_numbers(path):
+    """Function to read one number per line from a file, or from stdin when path is '-'"""
+    if path == '-':
+        return [line.strip() for line in sys.stdin if line.strip()]
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _collect_cli_inputs(paths, extension):
+    """Function to expand files and directories into (path, relative_dir, stem) inputs.
+
+    relative_dir is the file's directory below the given directory, so outputs can keep the
+    same layout, and stem names the outputs. Returns (inputs, errors).
+    """
+    inputs = []
+    errors = []
+    for path in paths:
+        if path == '-':
+            inputs.append((path, '', 'stdin'))
+            continue
+        if not os.path.isdir(path):
+            inputs.append((path, '', os.path.splitext(os.path.basename(path))[0]))
+            continue
+        found = False
+        for root, _, files in sorted(os.walk(path)):
+            relative_dir = os.path.relpath(root, path)
+            if relative_dir == os.curdir:
+                relative_dir = ''
+            for name in sorted(files):
+                if name.lower().endswith(extension):
+                    inputs.append((os.path.join(root, name), relative_dir, os.path.splitext(name)[0]))
+                    found = True
+        if not found:
+            errors.append(f"{path}: no {extension} files found")
+    return inputs, errors
+
+def _iter_cli_outputs(command, path, relative_dir, stem, options):
+    """Generator that runs one conversion and yields the created file paths as they are written"""
+    output_dir = os.path.join(options['output_dir'], relative_dir)
+    if command == 'txt2vcf':
+        parts = iter_txt_to_vcf(path, stem, options['contact'], options['partition'], output_dir=output_dir)
+        for vcf_file_path, _, _ in parts:
+            if vcf_file_path:
+                yield vcf_file_path
+    elif command == 'msg2vcf':
+        parts = iter_msg_to_vcf(path, stem, options['contact'], options['partition'], output_dir=output_dir)
+        for vcf_file_path, _, _ in parts:
+            if vcf_file_path:
+                yield vcf_file_path
+    elif command == 'msg2txt':
+        txt_file_path = convert_msg_to_txt(path, output_dir, stem)
+        if txt_file_path is None:
+            raise RuntimeError("MSG to TXT conversion failed")
+        yield txt_file_path
+    elif command == 'msg2adm-navy':
+        result = convert_msg_to_adm_navy(path, options['adm'], options['navy'], output_dir, stem)
+        if result is None:
+            raise RuntimeError("MSG to ADM & NAVY conversion failed")
+        yield from result
+
+def _cli_worker(command, path, relative_dir, stem, options):
+    """Function run in a worker process, returns (path, created files, error)"""
+    try:
+        return path, list(_iter_cli_outputs(command, path, relative_dir, stem, options)), None
+    except Exception as e:
+        return path, [], str(e)
+
+def _stdin_to_file(command):
+    """Function to spool stdin into a temporary file so file based converters can read it"""
+    fd, stdin_path = tempfile.mkstemp(prefix='stdin_', suffix=CLI_INPUT_EXTENSIONS[command])
+    with os.fdopen(fd, 'wb') as f:
+        shutil.copyfileobj(sys.stdin.buffer, f)
+    return stdin_path
+
+def _run_cli_conversions(command, args, options):
+    """Function to fan conversions out over worker processes and print created files as they finish"""
+    inputs, errors = _collect_cli_inputs(args.inputs, CLI_INPUT_EXTENSIONS[command])
+    if not inputs and not errors:
+        errors.append("no input files")
+    # Inputs whose outputs would land on the same files can't run together
+    seen = {}
+    for path, relative_dir, stem in inputs:
+        key = os.path.normcase(os.path.abspath(os.path.join(options['output_dir'], relative_dir, stem)))
+        if key in seen:
+            errors.append(f"{path}: output would collide with {seen[key]}")
+        seen[key] = path
+    if errors:
+        for error in errors:
+            logger.error(error)
+        return 1
+
+    stdin_path = None
+    if any(path == '-' for path, _, _ in inputs):
+        stdin_path = _stdin_to_file(command)
+        inputs = [(stdin_path if path == '-' else path, relative_dir, stem) for path, relative_dir, stem in inputs]
+
+    failures = 0
+    try:
+        if args.jobs == 1 or len(inputs) == 1:
+            # Run in-process so partitions are printed as soon as each one is written
+            for path, relative_dir, stem in inputs:
+                try:
+                    for output_path in _iter_cli_outputs(command, path, relative_dir, stem, options):
+                        print(output_path, flush=True)
+                except Exception as e:
+                    logger.error(f"{path}: {str(e)}")
+                    failures += 1
+        else:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                futures = [executor.submit(_cli_worker, command, path, relative_dir, stem, options)
+                           for path, relative_dir, stem in inputs]
+                for future in as_completed(futures):
+                    path, output_paths, error = future.result()
+                    if error:
+                        logger.error(f"{path}: {error}")
+                        failures += 1
+                    for output_path in output_paths:
+                        print(output_path, flush=True)
+    finally:
+        if stdin_path is not None:
+            cleanup_files(stdin_path)
+    return 1 if failures else 0
+
+def run_cli(argv=None):
+    """Command-line entry point running the same conversions as the bot, without Telegram"""
+    parser = argparse.ArgumentParser(
+        prog=os.path.basename(sys.argv[0]),
+        description="Run the bot's conversions over files, directories or stdin ('-'). "
+                    "Created files are printed one per line as they are written."
+    )
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="only log errors")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, help_text in (('txt2vcf', "convert TXT files (one number per line) to VCF"),
+                               ('msg2vcf', "extract phone numbers from MSG files into VCF")):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument('inputs', nargs='+', help="files, directories or '-' for stdin")
+        sub.add_argument('-c', '--contact', default='Contact', help="contact name prefix (default: Contact)")
+        sub.add_argument('-p', '--partition', type=int, default=None, help="numbers per VCF file (default: unlimited)")
+        sub.add_argument('-o', '--output-dir', default='downloads',
+                         help="output directory, directory inputs keep their layout (default: downloads)")
+
+    sub = subparsers.add_parser('msg2txt', help="convert MSG files to TXT")
+    sub.add_argument('inputs', nargs='+', help="files, directories or '-' for stdin")
+    sub.add_argument('-o', '--output-dir', default='downloads',
+                     help="output directory, directory inputs keep their layout (default: downloads)")
+
+    sub = subparsers.add_parser('msg2adm-navy', help="convert MSG files to ADM & NAVY TXT")
+    sub.add_argument('inputs', nargs='+', help="files, directories or '-' for stdin")
+    sub.add_argument('--adm', required=True, help="ADM number")
+    sub.add_argument('--navy', required=True, help="NAVY number")
+    sub.add_argument('-o', '--output-dir', default='downloads',
+                     help="output directory, directory inputs keep their layout (default: downloads)")
+
+    sub = subparsers.add_parser('adm-navy', help="create AdminNavy.vcf from ADM and NAVY number lists")
+    sub.add_argument('--adm', required=True, help="file with ADM numbers, one per line ('-' for stdin)")
+    sub.add_argument('--navy', required=True, help="file with NAVY numbers, one per line ('-' for stdin)")
+    sub.add_argument('-o', '--output-dir', default='downloads', help="output directory (default: downloads)")
+
+    sub = subparsers.add_parser('contacts', help="create contacts.vcf from 'name,number' lines")
+    sub.add_argument('input', help="file with 'name,number' lines ('-' for stdin)")
+    sub.add_argument('-o', '--output-dir', default='downloads', help="output directory (default: downloads)")
+
+    args = parser.parse_args(argv)
+    if args.quiet:
+        logging.getLogger().setLevel(logging.ERROR)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if getattr(args, 'partition', None) is not None and args.partition < 1:
+        parser.error("--partition must be at least 1")
+
+    if args.command == 'adm-navy':
+        vcf_file_path = create_vcf_from_multiple_numbers(_read_numbers(args.adm), _read_numbers(args.navy), args.output_dir)
+    elif args.command == 'contacts':
+        contacts = []
+        for line in _read_numbers(args.input):
+            name, _, number = line.rpartition(',')
+            contacts.append({'name': name.strip() or 'Contact', 'number': number.strip()})
+        vcf_file_path = create_vcf_from_contacts(contacts, args.output_dir)
+    else:
+        options = {
+            'output_dir': args.output_dir,
+            'contact': getattr(args, 'contact', None),
+            'partition': getattr(args, 'partition', None),
+            'adm': getattr(args, 'adm', None),
+            'navy': getattr(args, 'navy', None),
+        }
+        return _run_cli_conversions(args.command, args, options)
+
+    if vcf_file_path is None:
+        return 1
+    print(vcf_file_path, flush=True)
+    return 0
+
 if __name__ == "__main__":
-    import asyncio
+    # Any arguments run the converters headless instead of starting the bot
+    if len(sys.argv) > 1:
+        sys.exit(run_cli())
+
     os.makedirs("downloads", exist_ok=True)
 
     _token = os.getenv("BOT_TOKEN") or "PASTE_YOUR_TELEGRAM_BOT_TOKEN_HERE"
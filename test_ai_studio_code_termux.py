@@ -0,0 +1,214 @@
+import asyncio
+import codecs
+import io
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("telegram")
+pytest.importorskip("extract_msg")
+
+import ai_studio_code_termux as bot
+
+
+def scan(data, chunk_size=None):
+    if chunk_size is None:
+        return list(bot.iter_phone_numbers([data]))
+    return list(bot.iter_phone_numbers(bot._iter_chunks(data, chunk_size)))
+
+
+def make_numbers(count):
+    return [f"+4477{i:08d}" for i in range(count)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 13, 64, 255, 256, 257, 4096])
+def test_chunked_scan_matches_unchunked_on_long_runs(chunk_size):
+    # One long line of space-separated numbers, so chunk boundaries fall inside numbers
+    numbers = make_numbers(2000)
+    data = " ".join(numbers).encode("ascii")
+    assert scan(data) == numbers
+    assert scan(data, chunk_size) == numbers
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 17, 1024])
+def test_chunked_scan_matches_unchunked_on_mixed_text(chunk_size):
+    data = (
+        b"Call +91 98765 43210 or (555) 123-4567 today;ID1234567890;\n"
+        b"name,9876543210,foo@example.com\n"
+        b"date 2024-01-15 10:30 host 192.168.100.200\n"
+    ) * 50
+    assert scan(data, chunk_size) == scan(data)
+    assert scan(data)[:3] == ["+919876543210", "5551234567", "9876543210"]
+
+
+def test_utf16_attachment_is_scanned():
+    data = codecs.BOM_UTF16_LE + "tel 0044 20 7946 0958\n".encode("utf-16-le")
+    assert scan(data, 5) == ["00442079460958"]
+
+
+def test_dotted_groups_are_not_phone_numbers():
+    assert scan(b"ip 192.168.100.200 v1.2.3.4.5.6") == []
+    assert scan(b"call 555.123.4567") == ["5551234567"]
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b"Room 101 9876543210", ["9876543210"]),
+    (b"9876543210 12", ["9876543210"]),
+    (b"123 456 7890 123 456 7890", ["1234567890", "1234567890"]),
+    (b"+91 9876543210", ["+919876543210"]),
+    (b"+91 98765 43210", ["+919876543210"]),
+    (b"+44 20 7946 0958", ["+442079460958"]),
+    (b"12345678901234567890", []),
+])
+def test_adjacent_digit_groups_are_not_merged(data, expected):
+    assert scan(data) == expected
+    assert scan(data, 3) == expected
+
+
+def test_safe_filename_stays_in_output_directory():
+    assert bot._safe_filename("../../x") == "x"
+    assert bot._safe_filename("../..") == "contacts"
+    assert bot._safe_filename("My List_1") == "My List_1"
+
+
+def test_scan_stops_when_canceled():
+    cancel_event = threading.Event()
+    cancel_event.set()
+    data = " ".join(make_numbers(10)).encode("ascii")
+    assert list(bot.iter_phone_numbers(bot._iter_chunks(data, 16), cancel_event)) == []
+
+
+def test_vcf_progress_is_reported_every_progress_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "PROGRESS_RECORDS", 3)
+    parts = list(bot.iter_numbers_to_vcf([str(n) for n in range(10)], "x", "C", output_dir=str(tmp_path)))
+    assert parts == [(None, 3, 10), (None, 6, 10), (None, 9, 10), (str(tmp_path / "x_1.vcf"), 10, 10)]
+
+
+def test_vcf_cancel_stops_and_removes_partial_partition(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "PROGRESS_RECORDS", 3)
+    cancel_event = threading.Event()
+    parts = bot.iter_numbers_to_vcf([str(n) for n in range(10)], "x", "C", 4, cancel_event, str(tmp_path))
+    assert next(parts) == (None, 3, 10)
+    cancel_event.set()
+    assert list(parts) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_vcf_closed_generator_removes_partial_partition(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "PROGRESS_RECORDS", 3)
+    parts = bot.iter_numbers_to_vcf([str(n) for n in range(10)], "x", "C", output_dir=str(tmp_path))
+    assert next(parts) == (None, 3, 10)
+    parts.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+class FakeMessage:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text, reply_markup=None):
+        self.edits.append(text)
+
+
+def test_progress_reporter_throttles_edits():
+    async def run():
+        message = FakeMessage()
+        reporter = bot.ProgressReporter(message, "Converting", interval=3600)
+        await reporter.update(1, 10, 0)
+        await reporter.update(5, 10, 1)
+        await reporter.finish("done")
+        return message.edits
+
+    edits = asyncio.run(run())
+    assert len(edits) == 2
+    assert edits[0].startswith("⏳ Converting\nRecords: 1/10\nParts sent: 0\nETA: ")
+    assert edits[1] == "done"
+
+
+def test_progress_reporter_skips_unchanged_text():
+    async def run():
+        message = FakeMessage()
+        reporter = bot.ProgressReporter(message, "Converting", interval=0)
+        await reporter.update(10, 10, 1)
+        await reporter.update(10, 10, 1)
+        return message.edits
+
+    assert asyncio.run(run()) == ["⏳ Converting\nRecords: 10/10\nParts sent: 1"]
+
+
+def write_numbers(path, numbers):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(f"{n}\n" for n in numbers))
+
+
+def set_stdin(monkeypatch, data):
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_cli_keeps_directory_layout_under_output_dir(tmp_path, capsys, jobs):
+    write_numbers(tmp_path / "in" / "a" / "list.txt", ["1000000000", "1000000001"])
+    write_numbers(tmp_path / "in" / "b" / "list.txt", ["2000000000"])
+    out = tmp_path / "out"
+    assert bot.run_cli(["-q", "-j", jobs, "txt2vcf", str(tmp_path / "in"), "-o", str(out)]) == 0
+    printed = sorted(capsys.readouterr().out.splitlines())
+    assert printed == [str(out / "a" / "list_1.vcf"), str(out / "b" / "list_1.vcf")]
+    assert "TEL;TYPE=CELL:2000000000" in (out / "b" / "list_1.vcf").read_text()
+
+
+def test_cli_stdout_only_carries_created_paths(tmp_path, capsys):
+    write_numbers(tmp_path / "good.txt", ["1000000000"])
+    assert bot.run_cli(["-q", "txt2vcf", str(tmp_path / "good.txt"), str(tmp_path / "missing.txt"),
+                        "-o", str(tmp_path / "out")]) == 1
+    assert capsys.readouterr().out.splitlines() == [str(tmp_path / "out" / "good_1.vcf")]
+
+
+def test_cli_rejects_colliding_outputs(tmp_path, capsys):
+    write_numbers(tmp_path / "a" / "list.txt", ["1000000000"])
+    write_numbers(tmp_path / "b" / "list.txt", ["2000000000"])
+    out = tmp_path / "out"
+    assert bot.run_cli(["-q", "txt2vcf", str(tmp_path / "a" / "list.txt"), str(tmp_path / "b" / "list.txt"),
+                        "-o", str(out)]) == 1
+    assert capsys.readouterr().out == ""
+    assert not out.exists()
+
+
+def test_cli_rejects_stdin_colliding_with_file(tmp_path, capsys, monkeypatch):
+    write_numbers(tmp_path / "stdin.txt", ["1000000000"])
+    set_stdin(monkeypatch, b"2000000000\n")
+    assert bot.run_cli(["-q", "txt2vcf", "-", str(tmp_path / "stdin.txt"), "-o", str(tmp_path / "out")]) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_cli_stdin_does_not_touch_user_files(tmp_path, capsys, monkeypatch):
+    out = tmp_path / "out"
+    write_numbers(out / "stdin.txt", ["999"])
+    set_stdin(monkeypatch, b"5550000000\n")
+    assert bot.run_cli(["-q", "-j", "1", "txt2vcf", "-", "-o", str(out)]) == 0
+    assert capsys.readouterr().out.splitlines() == [str(out / "stdin_1.vcf")]
+    assert (out / "stdin.txt").read_text() == "999\n"
+    assert "TEL;TYPE=CELL:5550000000" in (out / "stdin_1.vcf").read_text()
+
+
+def test_cli_empty_directory_fails(tmp_path, capsys):
+    (tmp_path / "empty").mkdir()
+    assert bot.run_cli(["-q", "txt2vcf", str(tmp_path / "empty"), "-o", str(tmp_path / "out")]) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_cli_empty_file_fails(tmp_path, capsys):
+    (tmp_path / "blank.txt").write_text("\n  \n")
+    assert bot.run_cli(["-q", "txt2vcf", str(tmp_path / "blank.txt"), "-o", str(tmp_path / "out")]) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_cli_contacts_and_adm_navy_honor_output_dir(tmp_path, capsys, monkeypatch):
+    out = tmp_path / "out"
+    set_stdin(monkeypatch, b"Al,123\n456\n")
+    assert bot.run_cli(["-q", "contacts", "-", "-o", str(out)]) == 0
+    write_numbers(tmp_path / "adm.txt", ["1"])
+    write_numbers(tmp_path / "navy.txt", ["2"])
+    assert bot.run_cli(["-q", "adm-navy", "--adm", str(tmp_path / "adm.txt"),
+                        "--navy", str(tmp_path / "navy.txt"), "-o", str(out)]) == 0
+    assert capsys.readouterr().out.splitlines() == [str(out / "contacts.vcf"), str(out / "AdminNavy.vcf")]